@@ -0,0 +1,269 @@
+from fastapi.routing import APIRoute
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine, event, inspect, make_url, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import configure_mappers, sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateIndex, CreateTable
+from contextlib import contextmanager
+import asyncio
+import hashlib
+import pytest
+import pytest_asyncio
+import re
+
+from main import app
+from src.config import get_settings
+from src.db.database import Base, get_db
+from src.services.product_service import clear_product_cache
+
+import os
+
+# Seed rows as one hand-written multi-row INSERT, sent straight to the driver
+SEED_PRODUCTS_SQL = (
+    "INSERT INTO products (name, description, price, inventory) VALUES "
+    "('Test Product 1', 'Description 1', 10.00, 20), "
+    "('Test Product 2', 'Description 2', 20.00, 15), "
+    "('Test Product 3', 'Description 3', 5.00, 50), "
+    "('Luxury Item', 'Very expensive item', 100.00, 5), "
+    "('Bulk Item', 'Item often sold in bulk', 2.50, 200)"
+)
+
+
+def schema_fingerprint():
+    """Hash of the DDL and seed data, so a change to either builds a fresh template database"""
+    fingerprint = hashlib.blake2b(digest_size=8)
+    dialect = postgresql.dialect()
+    for table in Base.metadata.sorted_tables:
+        fingerprint.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            fingerprint.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+    fingerprint.update(SEED_PRODUCTS_SQL.encode())
+    return fingerprint
+
+
+# Create a test database with PostgreSQL; each session clones it from a template
+# database, and each pytest-xdist worker gets its own copy
+BASE_TEST_DATABASE_URL = make_url(get_settings().test_database_url)
+WORKER_ID = os.getenv("PYTEST_XDIST_WORKER")
+SQLALCHEMY_TEST_DATABASE_URL = BASE_TEST_DATABASE_URL
+if WORKER_ID:
+    SQLALCHEMY_TEST_DATABASE_URL = BASE_TEST_DATABASE_URL.set(
+        database=f"{BASE_TEST_DATABASE_URL.database}_{WORKER_ID}"
+    )
+_fingerprint = schema_fingerprint()
+TEMPLATE_DATABASE = f"{BASE_TEST_DATABASE_URL.database}_template_{_fingerprint.hexdigest()}"
+TEMPLATE_LOCK_KEY = int.from_bytes(_fingerprint.digest()[:4], "big")
+
+# The engine is picked in pytest_configure, once the command line has been parsed
+engine = None
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+def create_postgres_engine():
+    # Keep a small pool of warm connections; each test's transaction reuses one of them
+    return create_engine(
+        SQLALCHEMY_TEST_DATABASE_URL,
+        pool_size=10,
+        max_overflow=0,
+        pool_pre_ping=False,
+        pool_reset_on_return="rollback",
+        echo=False
+    )
+
+
+def create_sqlite_engine():
+    # A single shared connection keeps the in-memory database alive for the whole session
+    sqlite_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+        echo=False
+    )
+    
+    # pysqlite manages transactions itself and breaks SAVEPOINT; let SQLAlchemy emit BEGIN
+    @event.listens_for(sqlite_engine, "connect")
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+    
+    @event.listens_for(sqlite_engine, "begin")
+    def do_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+    
+    return sqlite_engine
+
+
+# Override the get_db dependency
+def override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@contextmanager
+def dependency_override(dependency, override):
+    """Install a dependency override, restoring whatever was there before on exit"""
+    previous = app.dependency_overrides.get(dependency)
+    app.dependency_overrides[dependency] = override
+    try:
+        yield
+    finally:
+        if previous is None:
+            app.dependency_overrides.pop(dependency, None)
+        else:
+            app.dependency_overrides[dependency] = previous
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--fast-db",
+        action="store_true",
+        default=False,
+        help="Run the tests against an in-memory SQLite database instead of PostgreSQL"
+    )
+
+
+def pytest_configure(config):
+    global engine
+    engine = create_sqlite_engine() if config.getoption("--fast-db") else create_postgres_engine()
+    TestingSessionLocal.configure(bind=engine)
+    
+    # Pay the one-off mapper configuration and OpenAPI schema build once per
+    # process (each xdist worker included) instead of inside the first test
+    configure_mappers()
+    app.openapi()
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    # One event loop for the whole session, so the session-scoped client can live on it
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def client():
+    # Enter the app's lifespan once and call it in-process on the test's event loop,
+    # without TestClient's per-request thread portal
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as test_client:
+            yield test_client
+
+
+def create_schema(bind):
+    """Create the tables once; skip the DDL entirely when the schema is already there"""
+    if not inspect(bind).has_table("products"):
+        Base.metadata.create_all(bind=bind, checkfirst=False)
+
+
+def create_template_database(connection):
+    """Build the template database: schema plus seed data, created once and reused across runs"""
+    # Build under a scratch name and only rename it once it is complete, so a failed or
+    # interrupted build never leaves a half-seeded template behind under the real name
+    building_database = f"{TEMPLATE_DATABASE}_building"
+    connection.execute(text(f'DROP DATABASE IF EXISTS "{building_database}"'))
+    connection.execute(text(f'CREATE DATABASE "{building_database}"'))
+    
+    template_engine = create_engine(SQLALCHEMY_TEST_DATABASE_URL.set(database=building_database))
+    try:
+        create_schema(template_engine)
+        
+        # Create test data with a single raw INSERT, skipping SQL compilation
+        with template_engine.begin() as template_connection:
+            template_connection.exec_driver_sql(SEED_PRODUCTS_SQL)
+    except BaseException:
+        template_engine.dispose()
+        connection.execute(text(f'DROP DATABASE IF EXISTS "{building_database}"'))
+        raise
+    
+    # A database can only be renamed or used as a template while nobody is connected to it
+    template_engine.dispose()
+    connection.execute(text(f'ALTER DATABASE "{building_database}" RENAME TO "{TEMPLATE_DATABASE}"'))
+
+
+@pytest.fixture(scope="session")
+def test_database(request):
+    if request.config.getoption("--fast-db"):
+        # The in-memory database is private to this process: no template or xdist naming needed
+        create_schema(engine)
+        with engine.begin() as connection:
+            connection.exec_driver_sql(SEED_PRODUCTS_SQL)
+        with dependency_override(get_db, override_get_db):
+            yield
+        engine.dispose()
+        return
+    
+    # Clone this session's database from the template instead of running DDL and seed inserts
+    database = SQLALCHEMY_TEST_DATABASE_URL.database
+    maintenance_engine = create_engine(
+        SQLALCHEMY_TEST_DATABASE_URL.set(database="postgres"), isolation_level="AUTOCOMMIT"
+    )
+    with maintenance_engine.connect() as connection:
+        # Serialize template creation and cloning across xdist workers
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": TEMPLATE_LOCK_KEY})
+        try:
+            template_exists = connection.execute(
+                text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": TEMPLATE_DATABASE}
+            ).scalar()
+            if not template_exists:
+                create_template_database(connection)
+            
+            connection.execute(text(f'DROP DATABASE IF EXISTS "{database}"'))
+            connection.execute(text(f'CREATE DATABASE "{database}" TEMPLATE "{TEMPLATE_DATABASE}"'))
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": TEMPLATE_LOCK_KEY})
+    
+    # Requests outside db_session get a fresh session on the test database
+    with dependency_override(get_db, override_get_db):
+        yield
+    
+    # Clean up; close pooled connections so the database can be dropped
+    engine.dispose()
+    with maintenance_engine.connect() as connection:
+        connection.execute(text(f'DROP DATABASE IF EXISTS "{database}"'))
+    maintenance_engine.dispose()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def seeded_db(client, test_database):
+    # Send one harmless request to every route so the first test using the database doesn't
+    # pay for first-use validation and serialization setup. These run outside any rolled-back
+    # transaction, so only reads, unknown ids (404) and rejected bodies (422) are allowed
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        path = re.sub(r"{[^}]+}", "0", route.path)
+        for method in route.methods:
+            json_body = None if method == "GET" else {}
+            response = await client.request(method, path, json=json_body)
+            expected_statuses = (200, 404) if method == "GET" else (404, 422)
+            assert response.status_code in expected_statuses, (
+                f"Warm-up request {method} {path} returned {response.status_code}"
+            )
+
+
+@pytest.fixture(scope="function")
+def db_session(seeded_db):
+    # Run the test inside an outer transaction that is rolled back afterwards
+    connection = engine.connect()
+    trans = connection.begin()
+    
+    # Commits made by the app only release a SAVEPOINT inside the outer transaction
+    session = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
+    
+    # Every request in the test shares this session (and its identity map)
+    def override_get_test_session():
+        # The fixture owns the session, so don't close it after the request
+        yield session
+    
+    with dependency_override(get_db, override_get_test_session):
+        yield session
+    
+    # Undo everything the test did
+    session.close()
+    trans.rollback()
+    connection.close()
+    clear_product_cache()
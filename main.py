@@ -1,14 +1,30 @@
+from anyio import to_thread
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from src.db.models import model
+from src.config import get_settings
 from src.db.database import engine
 from src import router
 
-model.Base.metadata.create_all(bind=engine)
+settings = get_settings()
 
-app = FastAPI(title="Mini Order Processing Service")
+# Sync route handlers run in AnyIO's worker threadpool while they wait on the database
+THREADPOOL_SIZE = settings.threadpool_size
+
+# Create tables only when asked, so each worker doesn't repeat the DDL on startup
+if settings.run_migrations:
+    model.Base.metadata.create_all(bind=engine)
+
+app = FastAPI(title="Mini Order Processing Service", default_response_class=ORJSONResponse)
 
 app.include_router(router=router)
 
+
+@app.on_event("startup")
+async def configure_threadpool():
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+
 @app.get("/")
 async def read_root():
     return {"message": "Mini Order Processing Service"}
@@ -0,0 +1,17 @@
+#!/bin/sh
+# Production entrypoint: several uvicorn worker processes running uvloop and httptools
+set -e
+
+# Exported so every worker knows it shares the database with others (see PRODUCT_CACHE_TTL)
+export WEB_CONCURRENCY="${WEB_CONCURRENCY:-$(( $(nproc) * 2 + 1 ))}"
+
+# Create tables once before forking workers
+RUN_MIGRATIONS=1 python -c "import main"
+
+exec uvicorn main:app \
+    --host "${HOST:-0.0.0.0}" \
+    --port "${PORT:-8000}" \
+    --workers "$WEB_CONCURRENCY" \
+    --loop uvloop \
+    --http httptools \
+    --no-access-log
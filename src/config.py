@@ -0,0 +1,62 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from dotenv import load_dotenv
+
+
+@dataclass(frozen=True)
+class Settings:
+    database_url: str
+    test_database_url: str
+    pool_size: int
+    max_overflow: int
+    threadpool_size: int
+    run_migrations: bool
+    web_concurrency: int
+    product_cache_ttl: float
+
+
+@dataclass(frozen=True)
+class PricingSettings:
+    bulk_discount_threshold: int
+    bulk_discount_percent: int
+    bulk_discount_multiplier: float
+    free_shipping_threshold: float
+    shipping_fee: float
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Read .env once per process; variables already set in the environment win"""
+    load_dotenv(override=False)
+    pool_size = int(os.getenv("DB_POOL_SIZE", 5))
+    max_overflow = int(os.getenv("DB_MAX_OVERFLOW", 5))
+    web_concurrency = int(os.getenv("WEB_CONCURRENCY", 1))
+    return Settings(
+        database_url=os.getenv("SQLALCHEMY_DATABASE_URL"),
+        test_database_url=os.getenv("SQLALCHEMY_TEST_DATABASE_URL"),
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        # Every route uses the database, so threads beyond the pool's capacity would
+        # only queue for a connection until pool_timeout raises
+        threadpool_size=int(os.getenv("THREADPOOL_SIZE", pool_size + max_overflow)),
+        run_migrations=os.getenv("RUN_MIGRATIONS") == "1",
+        web_concurrency=web_concurrency,
+        # Each worker process has its own product cache that only its own writes invalidate,
+        # so with several workers it is off unless a TTL is asked for explicitly
+        product_cache_ttl=float(os.getenv("PRODUCT_CACHE_TTL", 30 if web_concurrency == 1 else 0))
+    )
+
+
+@lru_cache(maxsize=1)
+def get_pricing_settings() -> PricingSettings:
+    """Read the order pricing rules once per process; only order processing needs them"""
+    load_dotenv(override=False)
+    bulk_discount_percent = int(os.getenv("BULK_DISCOUNT_PERCENT"))
+    return PricingSettings(
+        bulk_discount_threshold=int(os.getenv("BULK_DISCOUNT_THRESHOLD")),
+        bulk_discount_percent=bulk_discount_percent,
+        bulk_discount_multiplier=1 - bulk_discount_percent / 100,
+        free_shipping_threshold=float(os.getenv("FREE_SHIPPING_THRESHOLD")),
+        shipping_fee=float(os.getenv("SHIPPING_FEE"))
+    )
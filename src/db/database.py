@@ -1,14 +1,21 @@
-import os
-from dotenv import load_dotenv
-load_dotenv()
-SQLALCHEMY_DATABASE_URL = os.getenv("SQLALCHEMY_DATABASE_URL")
-
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from src.config import get_settings
+
+
+settings = get_settings()
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_engine(
+    settings.database_url,
+    pool_size=settings.pool_size,
+    max_overflow=settings.max_overflow,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    query_cache_size=1200,
+    executemany_mode="values_plus_batch"
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
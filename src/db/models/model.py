@@ -8,13 +8,13 @@ class Product(Base):
     __tablename__ = "products"
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, index=True)
+    name = Column(String)
     description = Column(String)
     price = Column(Float)
     inventory = Column(Integer)
 
     # Relationship
-    order_items = relationship("OrderItem", back_populates="product")
+    order_items = relationship("OrderItem", back_populates="product", lazy="raise")
 
 
 class Order(Base):
@@ -26,23 +26,23 @@ class Order(Base):
     subtotal = Column(Float)
     shipping_fee = Column(Float)
     total_amount = Column(Float)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
     # Relationship
-    items = relationship("OrderItem", back_populates="order")
+    items = relationship("OrderItem", back_populates="order", lazy="raise")
 
 
 class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
-    product_id = Column(Integer, ForeignKey("products.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), index=True)
     quantity = Column(Integer)
     unit_price = Column(Float)
     discount_applied = Column(Boolean, default=False)
 
     # Relationships
-    order = relationship("Order", back_populates="items")
-    product = relationship("Product", back_populates="order_items")
+    order = relationship("Order", back_populates="items", lazy="raise")
+    product = relationship("Product", back_populates="order_items", lazy="raise")
 
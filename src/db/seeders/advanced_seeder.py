@@ -1,9 +1,12 @@
 # advanced_seeder.py
 import random
+import numpy as np
 from datetime import datetime, timedelta
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from src.db.database import engine, SessionLocal, Base
 from src.db.models.model import Product, Order, OrderItem
+from src.services.order_service import DECREMENT_INVENTORY
 
 # Import the products from the basic seeder
 from src.db.seeders.seeder import PRODUCTS
@@ -27,6 +30,7 @@ BULK_DISCOUNT_THRESHOLD = 5  # Quantity threshold for bulk discount
 BULK_DISCOUNT_PERCENT = 10  # 10% discount for bulk orders
 SHIPPING_FEE = 5.0  # $5 shipping fee
 FREE_SHIPPING_THRESHOLD = 50.0  # Free shipping for orders over $50
+BULK_DISCOUNT_MULTIPLIER = 1 - BULK_DISCOUNT_PERCENT / 100
 
 def seed_products(db: Session):
     """Seed the database with product data"""
@@ -60,6 +64,11 @@ def seed_orders(db: Session, num_orders=20):
         print(f"Database already contains {existing_orders} orders. Skipping order seeding.")
         return
     
+    # Bulk inserts with no rows would insert a single row of NULLs instead
+    if num_orders <= 0:
+        print("No orders requested. Skipping order seeding.")
+        return
+    
     # Get all products from the database
     products = db.query(Product).all()
     
@@ -67,78 +76,93 @@ def seed_orders(db: Session, num_orders=20):
         print("No products found in database. Please run seed_products first.")
         return
     
+    # Draw all random values for every order up front
+    rng = np.random.default_rng()
+    max_items = min(4, len(products))
+    customer_indices = rng.integers(0, len(CUSTOMERS), num_orders).tolist()
+    item_counts = rng.integers(1, max_items + 1, num_orders).tolist()
+    # Ranking a random row per order gives distinct product picks (no duplicates)
+    product_indices = rng.random((num_orders, len(products))).argsort(axis=1)[:, :max_items].tolist()
+    quantities = rng.integers(1, 9, (num_orders, max_items)).tolist()
+    days_ago = rng.integers(0, 31, num_orders).tolist()
+    now = datetime.now()
+    bulk_threshold = BULK_DISCOUNT_THRESHOLD
+    discount_multiplier = BULK_DISCOUNT_MULTIPLIER
+    
     # Create random orders
-    for _ in range(num_orders):
+    order_rows = []
+    order_item_lists = []
+    inventory_used = {}
+    for i in range(num_orders):
         # Select a random customer
-        customer = random.choice(CUSTOMERS)
-        
-        # Determine number of items in this order (1-4)
-        num_items = random.randint(1, 4)
-        
-        # Randomly select products for this order (no duplicates)
-        order_products = random.sample(products, num_items)
+        customer = CUSTOMERS[customer_indices[i]]
         
         # Calculate order details
         order_items = []
         subtotal = 0.0
         
-        for product in order_products:
-            # Determine quantity (1-8)
-            quantity = random.randint(1, 8)
+        for j in range(item_counts[i]):
+            product = products[product_indices[i][j]]
+            quantity = quantities[i][j]
             
             # Calculate price with potential bulk discount
             unit_price = product.price
             discount_applied = False
             
-            if quantity >= BULK_DISCOUNT_THRESHOLD:
+            if quantity >= bulk_threshold:
                 discount_applied = True
-                unit_price = unit_price * (1 - BULK_DISCOUNT_PERCENT / 100)
+                unit_price = unit_price * discount_multiplier
             
             item_total = unit_price * quantity
             subtotal += item_total
             
             # Track item details for later
             order_items.append({
-                "product": product,
+                "product_id": product.id,
                 "quantity": quantity,
                 "unit_price": unit_price,
                 "discount_applied": discount_applied
             })
+            
+            # Track inventory to remove from the product
+            inventory_used[product.id] = inventory_used.get(product.id, 0) + quantity
         
         # Calculate shipping fee
         shipping_fee = SHIPPING_FEE if subtotal < FREE_SHIPPING_THRESHOLD else 0.0
         total_amount = subtotal + shipping_fee
         
         # Create a random order date within the last 30 days
-        days_ago = random.randint(0, 30)
-        order_date = datetime.now() - timedelta(days=days_ago)
+        order_date = now - timedelta(days=days_ago[i])
         
-        # Create order
-        db_order = Order(
-            customer_name=customer["name"],
-            customer_email=customer["email"],
-            subtotal=subtotal,
-            shipping_fee=shipping_fee,
-            total_amount=total_amount,
-            created_at=order_date
-        )
-        
-        db.add(db_order)
-        db.flush()  # Get the order ID without committing
-        
-        # Add order items and update inventory
-        for item in order_items:
-            db_item = OrderItem(
-                order_id=db_order.id,
-                product_id=item["product"].id,
-                quantity=item["quantity"],
-                unit_price=item["unit_price"],
-                discount_applied=item["discount_applied"]
-            )
-            db.add(db_item)
-            
-            # Update product inventory
-            item["product"].inventory -= item["quantity"]
+        order_rows.append({
+            "customer_name": customer["name"],
+            "customer_email": customer["email"],
+            "subtotal": subtotal,
+            "shipping_fee": shipping_fee,
+            "total_amount": total_amount,
+            "created_at": order_date
+        })
+        order_item_lists.append(order_items)
+    
+    # Insert all orders at once; RETURNING gives the ids in row order
+    order_ids = db.scalars(
+        insert(Order).returning(Order.id, sort_by_parameter_order=True),
+        order_rows
+    ).all()
+    
+    # Insert all order items with a single bulk INSERT
+    item_rows = [
+        {"order_id": order_id, **item}
+        for order_id, order_items in zip(order_ids, order_item_lists)
+        for item in order_items
+    ]
+    db.execute(insert(OrderItem), item_rows)
+    
+    # Update product inventory
+    db.execute(
+        DECREMENT_INVENTORY,
+        [{"pid": product_id, "qty": quantity} for product_id, quantity in inventory_used.items()]
+    )
     
     # Commit all changes
     db.commit()
@@ -0,0 +1,28 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+
+
+# Let browsers/proxies reuse list responses briefly, then revalidate with the ETag
+CACHE_CONTROL = "private, max-age=5"
+
+
+def if_none_match_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison as RFC 9110 requires: "*" matches anything and W/ prefixes are ignored"""
+    # Proxies that compress the body (e.g. nginx with gzip) weaken the ETag to W/"..."
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def cached_json_response(request: Request, content: bytes) -> Response:
+    """Return JSON content tagged with an ETag, or an empty 304 if the client already has it"""
+    etag = f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+    if if_none_match_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=content, media_type="application/json", headers=headers)
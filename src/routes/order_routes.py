@@ -1,28 +1,31 @@
-from fastapi import Depends, APIRouter, status
+from fastapi import Depends, APIRouter, Request, status
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from typing import List
 from src.schemas import schema
 from src.db.database import get_db
+from src.routes.http_cache import cached_json_response
 from src.services.order_service import OrderService
 
 
 order_router = APIRouter(tags=["Orders"])
 
+_ORDER_LIST_ADAPTER = TypeAdapter(List[schema.OrderResponse])
+
 
 @order_router.post("/add_order", response_model=schema.OrderResponse, status_code=status.HTTP_201_CREATED)
 def create_order(order: schema.OrderCreate, db: Session = Depends(get_db)):
-    order_service = OrderService(db)
-    return order_service.create_order(order)
+    return OrderService.create_order(db, order)
 
 
 @order_router.get("/get_all_orders", response_model=List[schema.OrderResponse])
-def get_all_orders(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    order_service = OrderService(db)
-    return order_service.get_all_orders(skip, limit)
+def get_all_orders(request: Request, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    orders = _ORDER_LIST_ADAPTER.validate_python(OrderService.get_all_orders(db, skip, limit))
+    # Returning a Response skips FastAPI's second response_model validation pass
+    return cached_json_response(request, _ORDER_LIST_ADAPTER.dump_json(orders))
 
 
 @order_router.get("/get_order/{order_id}", response_model=schema.OrderResponse)
 def get_order(order_id: int, db: Session = Depends(get_db)):
-    order_service = OrderService(db)
-    return order_service.get_order(order_id)
+    return OrderService.get_order(db, order_id)
 
@@ -1,49 +1,81 @@
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, insert, lambda_stmt, select, update
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.exc import IntegrityError
 from src.db.models import model
 from src.schemas import schema
-from dotenv import load_dotenv
-import os
+from src.config import get_pricing_settings
+from src.services.product_service import invalidate_product_cache
 
-load_dotenv()
+# Decrement inventory for every product in an order with one executemany UPDATE
+DECREMENT_INVENTORY = (
+    update(model.Product.__table__)
+    .where(model.Product.__table__.c.id == bindparam("pid"))
+    .values(inventory=model.Product.__table__.c.inventory - bindparam("qty"))
+)
 
-BULK_DISCOUNT_THRESHOLD = int(os.getenv("BULK_DISCOUNT_THRESHOLD"))
-BULK_DISCOUNT_PERCENT = int(os.getenv("BULK_DISCOUNT_PERCENT"))
-FREE_SHIPPING_THRESHOLD = float(os.getenv("FREE_SHIPPING_THRESHOLD"))
-SHIPPING_FEE = float(os.getenv("SHIPPING_FEE"))
+# Hot statements built once at import; lambda_stmt caches their compiled SQL
+# Lock rows in primary key order, so concurrent orders sharing products can't deadlock
+_LOCK_ORDER_PRODUCTS = lambda_stmt(
+    lambda: select(model.Product)
+    .where(model.Product.id.in_(bindparam("product_ids", expanding=True)))
+    .order_by(model.Product.id)
+    .with_for_update()
+)
+_GET_ORDER_LIST = lambda_stmt(
+    lambda: select(model.Order)
+    .options(selectinload(model.Order.items))
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+_GET_ORDER = lambda_stmt(
+    lambda: select(model.Order)
+    .options(selectinload(model.Order.items))
+    .where(model.Order.id == bindparam("order_id"))
+)
 
 
 class OrderService:
-    def __init__(self, db: Session):
-        self.db = db
-
-    def create_order(self, order: schema.OrderCreate):
+    @staticmethod
+    def create_order(db: Session, order: schema.OrderCreate):
         """Process a new order with discount and shipping fee calculation"""
         # Calculate order details and validate inventory
         order_items = []
+        reserved = {}
         subtotal = 0.0
+        # Pricing rules are read on first use, so importing the app doesn't require them
+        pricing = get_pricing_settings()
+        bulk_threshold = pricing.bulk_discount_threshold
+        discount_multiplier = pricing.bulk_discount_multiplier
+
+        # Load (and lock) every product in the order with a single query
+        product_ids = [item.product_id for item in order.items]
+        products = {
+            product.id: product
+            for product in db.scalars(_LOCK_ORDER_PRODUCTS, {"product_ids": product_ids})
+        }
 
         for item in order.items:
-            # Get product from database
-            product = self.db.query(model.Product).filter(model.Product.id == item.product_id).first()
+            product = products.get(item.product_id)
             if not product:
                 raise HTTPException(status_code=404, detail=f"Product with ID {item.product_id} not found")
         
-            # Check inventory
-            if product.inventory < item.quantity:
+            # Check inventory, counting earlier lines for the same product
+            available = product.inventory - reserved.get(item.product_id, 0)
+            if available < item.quantity:
                 raise HTTPException(
                     status_code=400, 
-                    detail=f"Not enough inventory for product {product.name}. Requested: {item.quantity}, Available: {product.inventory}"
+                    detail=f"Not enough inventory for product {product.name}. Requested: {item.quantity}, Available: {available}"
                 )
+            reserved[item.product_id] = reserved.get(item.product_id, 0) + item.quantity
             
             # Calculate item price with potential bulk discount
             unit_price = product.price
             discount_applied = False
             
-            if item.quantity >= BULK_DISCOUNT_THRESHOLD:
+            if item.quantity >= bulk_threshold:
                 discount_applied = True
-                unit_price = unit_price * (1 - BULK_DISCOUNT_PERCENT / 100)
+                unit_price = unit_price * discount_multiplier
             
             item_total = unit_price * item.quantity
             subtotal += item_total
@@ -57,77 +89,70 @@ class OrderService:
             })
             
         # Calculate shipping fee
-        shipping_fee = SHIPPING_FEE if subtotal < FREE_SHIPPING_THRESHOLD else 0.0
+        shipping_fee = pricing.shipping_fee if subtotal < pricing.free_shipping_threshold else 0.0
         total_amount = subtotal + shipping_fee
         
-        # Create order in database
-        db_order = model.Order(
-            customer_name=order.customer_name,
-            customer_email=order.customer_email,
-            subtotal=subtotal,
-            shipping_fee=shipping_fee,
-            total_amount=total_amount
-        )
+        # Create order in database, fetching the generated id and timestamp
+        db_order = db.execute(
+            insert(model.Order).returning(model.Order.id, model.Order.created_at),
+            {
+                "customer_name": order.customer_name,
+                "customer_email": order.customer_email,
+                "subtotal": subtotal,
+                "shipping_fee": shipping_fee,
+                "total_amount": total_amount
+            }
+        ).one()
         
-        # Add order to database
-        self.db.add(db_order)
-        self.db.flush()  # Get the order ID without committing
+        # Add all order items with a single bulk INSERT; an empty parameter list
+        # would insert one row of NULLs
+        if order_items:
+            db.execute(
+                insert(model.OrderItem),
+                [{"order_id": db_order.id, **item_data} for item_data in order_items]
+            )
         
-        # Add order items and update inventory
-        for item_data, item_request in zip(order_items, order.items):
-            db_item = model.OrderItem(
-                order_id=db_order.id,
-                product_id=item_data["product_id"],
-                quantity=item_data["quantity"],
-                unit_price=item_data["unit_price"],
-                discount_applied=item_data["discount_applied"]
+        # Update product inventory; an empty parameter list would run the UPDATE with no binds
+        if reserved:
+            db.execute(
+                DECREMENT_INVENTORY,
+                [{"pid": product_id, "qty": quantity} for product_id, quantity in reserved.items()]
             )
-            self.db.add(db_item)
-            
-            # Update product inventory
-            product = self.db.query(model.Product).filter(model.Product.id == item_request.product_id).first()
-            product.inventory -= item_request.quantity
         
         try:
-            self.db.commit()    
-            self.db.refresh(db_order)
+            db.commit()
+            invalidate_product_cache(*reserved)
             
-            # Build response
-            response = schema.OrderResponse(
+            # Build response from the values already computed (and validated) above
+            response = schema.OrderResponse.model_construct(
                 id=db_order.id,
-                customer_name=db_order.customer_name,
-                customer_email=db_order.customer_email,
-                items=[
-                    schema.OrderItemResponse(
-                        product_id=item.product_id,
-                        quantity=item.quantity,
-                        unit_price=item.unit_price,
-                        discount_applied=item.discount_applied
-                    )
-                    for item in db_order.items
-                ],
-                subtotal=db_order.subtotal,
-                shipping_fee=db_order.shipping_fee,
-                total_amount=db_order.total_amount,
+                customer_name=order.customer_name,
+                customer_email=order.customer_email,
+                items=[schema.OrderItemResponse.model_construct(**item_data) for item_data in order_items],
+                subtotal=subtotal,
+                shipping_fee=shipping_fee,
+                total_amount=total_amount,
                 created_at=db_order.created_at
             )
             
             return response
         
         except IntegrityError as e:
-            self.db.rollback()
+            db.rollback()
             raise HTTPException(status_code=400, detail=f"Database error: {str(e)}")
 
 
-    def get_all_orders(self, skip: int = 0, limit: int = 100):
+    @staticmethod
+    def get_all_orders(db: Session, skip: int = 0, limit: int = 100):
         """Get all orders"""
-        orders = self.db.query(model.Order).offset(skip).limit(limit).all()
+        orders = db.scalars(_GET_ORDER_LIST, {"skip": skip, "limit": limit}).all()
         return orders
 
 
-    def get_order(self, order_id: int):
+    @staticmethod
+    def get_order(db: Session, order_id: int):
         """Get a specific order by ID"""
-        order = self.db.query(model.Order).filter(model.Order.id == order_id).first()
+        order = db.scalars(_GET_ORDER, {"order_id": order_id}).first()
         if order is None:
             raise HTTPException(status_code=404, detail="Order not found")
         return order
\ No newline at end of file
@@ -1,69 +1,137 @@
+import threading
+from cachetools import TTLCache
 from fastapi import HTTPException
+from sqlalchemy import bindparam, lambda_stmt, select, update
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
+from src.config import get_settings
 from src.db.models import model
 from src.schemas import schema
 
 
-class ProductService:
-    def __init__(self, db: Session):
-        self.db = db
+# In-process cache of product responses keyed by product id; a TTL of 0 turns it off
+_PRODUCT_CACHE_TTL = get_settings().product_cache_ttl
+_product_cache = TTLCache(maxsize=1024, ttl=_PRODUCT_CACHE_TTL)
+_product_cache_lock = threading.Lock()
+
+# Bumped on every invalidation, so a lookup that raced with a write doesn't cache the old row
+_product_generations = {}
+_product_cache_clears = 0
+
+
+def _cache_generation(product_id: int):
+    return _product_cache_clears, _product_generations.get(product_id, 0)
+
+
+def invalidate_product_cache(*product_ids: int):
+    """Drop cached products after their rows change; does nothing when no ids are given"""
+    with _product_cache_lock:
+        for product_id in product_ids:
+            _product_cache.pop(product_id, None)
+            _product_generations[product_id] = _product_generations.get(product_id, 0) + 1
+
+
+def clear_product_cache():
+    """Drop every cached product"""
+    global _product_cache_clears
+    with _product_cache_lock:
+        _product_cache.clear()
+        _product_generations.clear()
+        _product_cache_clears += 1
 
 
-    def get_product_list(self, skip: int = 0, limit: int = 100):
+# Hot statements built once at import; lambda_stmt caches their compiled SQL
+_GET_PRODUCT_LIST = lambda_stmt(
+    lambda: select(model.Product).offset(bindparam("skip")).limit(bindparam("limit"))
+)
+_GET_PRODUCT = lambda_stmt(
+    lambda: select(model.Product).where(model.Product.id == bindparam("product_id"))
+)
+_ADJUST_INVENTORY = lambda_stmt(
+    lambda: update(model.Product)
+    .where(model.Product.id == bindparam("product_id"), model.Product.inventory + bindparam("quantity") >= 0)
+    .values(inventory=model.Product.inventory + bindparam("quantity"))
+    .returning(model.Product)
+)
+
+
+class ProductService:
+    @staticmethod
+    def get_product_list(db: Session, skip: int = 0, limit: int = 100):
         """Get all available products"""
-        products = self.db.query(model.Product).offset(skip).limit(limit).all()
+        products = db.scalars(_GET_PRODUCT_LIST, {"skip": skip, "limit": limit}).all()
         return products
 
 
-    def get_product(self, product_id: int):
+    @staticmethod
+    def get_product(db: Session, product_id: int):
         """Get a specific product by ID"""
-        product = self.db.query(model.Product).filter(model.Product.id == product_id).first()
+        if _PRODUCT_CACHE_TTL:
+            with _product_cache_lock:
+                cached = _product_cache.get(product_id)
+                generation = _cache_generation(product_id)
+            if cached is not None:
+                return cached
+
+        product = db.scalars(_GET_PRODUCT, {"product_id": product_id}).first()
         if product is None:
             raise HTTPException(status_code=404, detail="Product not found")
-        return product
 
+        # Cache a detached response model rather than the session-bound ORM object,
+        # unless the product was invalidated while it was being read
+        response = schema.ProductResponse.model_validate(product)
+        if _PRODUCT_CACHE_TTL:
+            with _product_cache_lock:
+                if _cache_generation(product_id) == generation:
+                    _product_cache[product_id] = response
+        return response
 
-    def create_product(self, product: schema.ProductCreate):
+
+    @staticmethod
+    def create_product(db: Session, product: schema.ProductCreate):
         """Create a new product"""
-        db_product = model.Product(**product.dict())
-        self.db.add(db_product)
+        db_product = model.Product(**product.model_dump())
+        db.add(db_product)
         try:
-            self.db.commit()
-            self.db.refresh(db_product)
+            db.commit()
+            db.refresh(db_product)
+            invalidate_product_cache(db_product.id)
             return db_product
         except IntegrityError:
-            self.db.rollback()
+            db.rollback()
             raise HTTPException(status_code=400, detail="Product already exists")
 
 
-    def update_product_inventory(self, product_id: int, inventory_update: schema.InventoryUpdate):
+    @staticmethod
+    def update_product_inventory(db: Session, product_id: int, inventory_update: schema.InventoryUpdate):
         """
         Update product inventory by adding or removing stock.
         Use positive quantity to add inventory, negative to remove inventory.
         """
-        # Get the product
-        product = self.db.query(model.Product).filter(model.Product.id == product_id).first()
-        if product is None:
-            raise HTTPException(status_code=404, detail="Product not found")
-    
-        # Calculate new inventory level
-        new_inventory = product.inventory + inventory_update.quantity
+        # Apply the change in a single UPDATE ... RETURNING; the WHERE clause
+        # keeps inventory from going below zero, even under concurrent updates
+        product = db.scalars(
+            _ADJUST_INVENTORY,
+            {"product_id": product_id, "quantity": inventory_update.quantity}
+        ).first()
         
-        # Validate new inventory level
-        if new_inventory < 0:
+        if product is None:
+            # Nothing was updated: either the product is missing or the change is invalid
+            current_inventory = db.query(model.Product.inventory).filter(model.Product.id == product_id).scalar()
+            if current_inventory is None:
+                raise HTTPException(status_code=404, detail="Product not found")
             raise HTTPException(
                 status_code=400,
-                detail=f"Cannot reduce inventory below zero. Current inventory: {product.inventory}, Requested change: {inventory_update.quantity}"
+                detail=f"Cannot reduce inventory below zero. Current inventory: {current_inventory}, Requested change: {inventory_update.quantity}"
             )
         
-        # Update inventory
-        product.inventory = new_inventory
+        # Build the response before commit expires the returned row
+        response = schema.ProductResponse.model_validate(product)
         
         try:
-            self.db.commit()
-            self.db.refresh(product)
-            return product
+            db.commit()
+            invalidate_product_cache(product_id)
+            return response
         except Exception as e:
-            self.db.rollback()
+            db.rollback()
             raise HTTPException(status_code=500, detail=f"Error updating inventory: {str(e)}")
@@ -1,118 +1,87 @@
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 import pytest
+from sqlalchemy import event, update
+from src.db.models.model import Order, OrderItem, Product
+from src.services.product_service import invalidate_product_cache
 
-from main import app
-from src.db.database import Base, get_db
-from src.db.models.model import Product
+# Every test drives the app through the async HTTP client
+pytestmark = pytest.mark.asyncio
 
-import dotenv
-import os
-dotenv.load_dotenv()
 
-# Create a test database with PostgreSQL
-SQLALCHEMY_TEST_DATABASE_URL = os.getenv("SQLALCHEMY_TEST_DATABASE_URL")
-engine = create_engine(SQLALCHEMY_TEST_DATABASE_URL)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-
-# Override the get_db dependency
-def override_get_db():
-    db = TestingSessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-app.dependency_overrides[get_db] = override_get_db
-
-client = TestClient(app)
-
-
-@pytest.fixture(scope="function")
-def setup_test_db():
-    # Drop all tables to ensure clean state
-    Base.metadata.drop_all(bind=engine)
-    
-    # Create test database tables
-    Base.metadata.create_all(bind=engine)
-    
-    # Create test data
-    db = TestingSessionLocal()
-    products = [
-        Product(name="Test Product 1", description="Description 1", price=10.00, inventory=20),
-        Product(name="Test Product 2", description="Description 2", price=20.00, inventory=15),
-        Product(name="Test Product 3", description="Description 3", price=5.00, inventory=50),
-        Product(name="Luxury Item", description="Very expensive item", price=100.00, inventory=5),
-        Product(name="Bulk Item", description="Item often sold in bulk", price=2.50, inventory=200),
-    ]
-    db.add_all(products)
-    db.commit()
-    
-    yield
-    
-    # Clean up
-    Base.metadata.drop_all(bind=engine)
+def json_of(response, expected_status):
+    """Check the status code and parse the body once"""
+    assert response.status_code == expected_status
+    return response.json()
 
 
 # Root endpoint tests
-def test_read_root(setup_test_db):
-    response = client.get("/")
-    assert response.status_code == 200
-    assert response.json() == {"message": "Mini Order Processing Service"}
+async def test_read_root(client):
+    response = await client.get("/")
+    body = json_of(response, 200)
+    assert body == {"message": "Mini Order Processing Service"}
 
 
 # Product endpoint tests
-def test_get_products(setup_test_db):
-    response = client.get("/products/get_all_products")
-    assert response.status_code == 200
-    products = response.json()
+async def test_get_products(client, seeded_db):
+    response = await client.get("/products/get_all_products")
+    products = json_of(response, 200)
     assert len(products) == 5
     assert products[0]["name"] == "Test Product 1"
     assert products[1]["name"] == "Test Product 2"
 
 
-def test_get_products_with_pagination(setup_test_db):
-    # Test skip parameter
-    response = client.get("/products/get_all_products?skip=2")
+@pytest.mark.parametrize("qs, expected_len, expected_first_name", [
+    pytest.param("?skip=2", 3, "Test Product 3", id="skip"),  # 5 total - 2 skipped
+    pytest.param("?limit=2", 2, "Test Product 1", id="limit"),
+    pytest.param("?skip=1&limit=2", 2, "Test Product 2", id="skip_and_limit"),
+])
+async def test_get_products_with_pagination(client, seeded_db, qs, expected_len, expected_first_name):
+    response = await client.get(f"/products/get_all_products{qs}")
+    products = json_of(response, 200)
+    assert len(products) == expected_len
+    assert products[0]["name"] == expected_first_name
+
+
+async def test_get_products_etag(client, db_session):
+    response = await client.get("/products/get_all_products")
     assert response.status_code == 200
-    products = response.json()
-    assert len(products) == 3  # 5 total - 2 skipped
-    assert products[0]["name"] == "Test Product 3"
-    
-    # Test limit parameter
-    response = client.get("/products/get_all_products?limit=2")
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, max-age=5"
+    
+    # Unchanged catalog revalidates without a body
+    response = await client.get("/products/get_all_products", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    
+    # Weak validators and "*" match too
+    response = await client.get("/products/get_all_products", headers={"If-None-Match": f"W/{etag}"})
+    assert response.status_code == 304
+    response = await client.get("/products/get_all_products", headers={"If-None-Match": '"other", *'})
     assert response.status_code == 200
-    products = response.json()
-    assert len(products) == 2
+    response = await client.get("/products/get_all_products", headers={"If-None-Match": "*"})
+    assert response.status_code == 304
     
-    # Test both skip and limit
-    response = client.get("/products/get_all_products?skip=1&limit=2")
+    # A change to the catalog produces a new ETag
+    await client.patch("/products/update_product_inventory/1", json={"quantity": 1})
+    response = await client.get("/products/get_all_products", headers={"If-None-Match": etag})
     assert response.status_code == 200
-    products = response.json()
-    assert len(products) == 2
-    assert products[0]["name"] == "Test Product 2"
-    assert products[1]["name"] == "Test Product 3"
+    assert response.headers["etag"] != etag
 
 
-def test_get_product(setup_test_db):
+async def test_get_product(client, seeded_db):
     # Get existing product
-    response = client.get("/products/get_product/1")
-    assert response.status_code == 200
-    product = response.json()
+    response = await client.get("/products/get_product/1")
+    product = json_of(response, 200)
     assert product["name"] == "Test Product 1"
     assert product["price"] == 10.0
     assert product["inventory"] == 20
     
     # Try to get non-existent product
-    response = client.get("/products/get_product/999")
-    assert response.status_code == 404
-    assert response.json()["detail"] == "Product not found"
+    response = await client.get("/products/get_product/999")
+    body = json_of(response, 404)
+    assert body["detail"] == "Product not found"
 
 
-def test_create_product(setup_test_db):
+async def test_create_product(client, db_session):
     # Create new product with valid data
     product_data = {
         "name": "New Product",
@@ -120,23 +89,21 @@ def test_create_product(setup_test_db):
         "price": 15.99,
         "inventory": 25
     }
-    response = client.post("/products/add_product", json=product_data)
-    assert response.status_code == 201
-    product = response.json()
+    response = await client.post("/products/add_product", json=product_data)
+    product = json_of(response, 201)
     assert product["name"] == "New Product"
     assert product["price"] == 15.99
     assert product["inventory"] == 25
     
     # Verify product was added to database
-    response = client.get("/products/get_all_products")
-    assert len(response.json()) == 6
+    assert db_session.query(Product).count() == 6
     
     # Test invalid product data
     invalid_product = {
         "name": "Invalid Product",
         "description": "Missing price and inventory"
     }
-    response = client.post("/products/add_product", json=invalid_product)
+    response = await client.post("/products/add_product", json=invalid_product)
     assert response.status_code == 422  # Validation error
     
     # Test negative price
@@ -146,7 +113,7 @@ def test_create_product(setup_test_db):
         "price": -10.0,
         "inventory": 5
     }
-    response = client.post("/products/add_product", json=invalid_product)
+    response = await client.post("/products/add_product", json=invalid_product)
     assert response.status_code == 422  # Validation error
     
     # Test negative inventory
@@ -156,233 +123,260 @@ def test_create_product(setup_test_db):
         "price": 10.0,
         "inventory": -5
     }
-    response = client.post("/products/add_product", json=invalid_product)
+    response = await client.post("/products/add_product", json=invalid_product)
     assert response.status_code == 422  # Validation error
 
 
 # Inventory update endpoint tests
-def test_update_inventory_add(setup_test_db):
-    """Test adding inventory to a product"""
+@pytest.mark.parametrize("quantity", [
+    pytest.param(10, id="add"),
+    pytest.param(-5, id="remove"),
+])
+async def test_update_inventory(client, db_session, quantity):
+    """Test adding inventory to and removing inventory from a product"""
     # First, get current inventory
-    response = client.get("/products/get_product/1")
-    assert response.status_code == 200
-    initial_inventory = response.json()["inventory"]
+    response = await client.get("/products/get_product/1")
+    initial_inventory = json_of(response, 200)["inventory"]
     
-    # Add 10 to inventory
-    update_data = {"quantity": 10}
-    response = client.patch("/products/update_product_inventory/1", json=update_data)
+    # Apply the change
+    update_data = {"quantity": quantity}
+    response = await client.patch("/products/update_product_inventory/1", json=update_data)
     
     # Check response
-    assert response.status_code == 200
-    assert response.json()["inventory"] == initial_inventory + 10
-    
-    # Verify the update persisted
-    response = client.get("/products/get_product/1")
-    assert response.json()["inventory"] == initial_inventory + 10
+    body = json_of(response, 200)
+    assert body["inventory"] == initial_inventory + quantity
 
 
-def test_update_inventory_remove(setup_test_db):
-    """Test removing inventory from a product"""
-    # First, get current inventory
-    response = client.get("/products/get_product/1")
-    assert response.status_code == 200
-    initial_inventory = response.json()["inventory"]
+async def test_get_product_after_inventory_changes(client, db_session):
+    """Test that cached product lookups see inventory changes"""
+    # First lookup fills the product cache
+    response = await client.get("/products/get_product/1")
+    assert json_of(response, 200)["inventory"] == 20
     
-    # Remove 5 from inventory
-    update_data = {"quantity": -5}
-    response = client.patch("/products/update_product_inventory/1", json=update_data)
+    # An inventory update invalidates the cached product
+    response = await client.patch("/products/update_product_inventory/1", json={"quantity": 5})
+    assert json_of(response, 200)["inventory"] == 25
+    response = await client.get("/products/get_product/1")
+    assert json_of(response, 200)["inventory"] == 25
     
-    # Check response
-    assert response.status_code == 200
-    assert response.json()["inventory"] == initial_inventory - 5
+    # So does an order for the product
+    order_data = {
+        "customer_name": "Cache Customer",
+        "customer_email": "cache@example.com",
+        "items": [{"product_id": 1, "quantity": 3}]
+    }
+    response = await client.post("/orders/add_order", json=order_data)
+    json_of(response, 201)
+    response = await client.get("/products/get_product/1")
+    assert json_of(response, 200)["inventory"] == 22
+
+
+async def test_get_product_skips_caching_a_row_invalidated_mid_read(client, db_session):
+    """Test that a product invalidated while it is being read isn't cached with the old values"""
+    def invalidate_during_read(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT products.id"):
+            invalidate_product_cache(1)
+    
+    connection = db_session.connection()
+    event.listen(connection, "before_cursor_execute", invalidate_during_read)
+    try:
+        response = await client.get("/products/get_product/1")
+        assert json_of(response, 200)["inventory"] == 20
+    finally:
+        event.remove(connection, "before_cursor_execute", invalidate_during_read)
     
-    # Verify the update persisted
-    response = client.get("/products/get_product/1")
-    assert response.json()["inventory"] == initial_inventory - 5
+    # Change the row behind the cache's back; a cached copy would still say 20
+    db_session.execute(update(Product).where(Product.id == 1).values(inventory=99))
+    response = await client.get("/products/get_product/1")
+    assert json_of(response, 200)["inventory"] == 99
 
 
-def test_update_inventory_invalid(setup_test_db):
+async def test_update_inventory_invalid(client, db_session):
     """Test removing more inventory than available"""
     # First, get current inventory
-    response = client.get("/products/get_product/1")
-    assert response.status_code == 200
-    initial_inventory = response.json()["inventory"]
+    response = await client.get("/products/get_product/1")
+    initial_inventory = json_of(response, 200)["inventory"]
     
     # Try to remove more than available
     update_data = {"quantity": -(initial_inventory + 10)}
-    response = client.patch("/products/update_product_inventory/1", json=update_data)
+    response = await client.patch("/products/update_product_inventory/1", json=update_data)
     
     # Check error response
-    assert response.status_code == 400
-    assert "Cannot reduce inventory below zero" in response.json()["detail"]
+    body = json_of(response, 400)
+    assert "Cannot reduce inventory below zero" in body["detail"]
     
     # Verify inventory wasn't changed
-    response = client.get("/products/get_product/1")
-    assert response.json()["inventory"] == initial_inventory
+    assert db_session.get(Product, 1).inventory == initial_inventory
 
 
-def test_update_inventory_nonexistent_product(setup_test_db):
+async def test_update_inventory_nonexistent_product(client, seeded_db):
     """Test updating inventory for a product that doesn't exist"""
     update_data = {"quantity": 10}
-    response = client.patch("/products/update_product_inventory/999", json=update_data)
+    response = await client.patch("/products/update_product_inventory/999", json=update_data)
     
     # Check error response
-    assert response.status_code == 404
-    assert "Product not found" in response.json()["detail"]
+    body = json_of(response, 404)
+    assert "Product not found" in body["detail"]
 
 
-def test_update_inventory_validation(setup_test_db):
+async def test_update_inventory_validation(client, seeded_db):
     """Test inventory update validation"""
     # Missing quantity field
     update_data = {}
-    response = client.patch("/products/update_product_inventory/1", json=update_data)
+    response = await client.patch("/products/update_product_inventory/1", json=update_data)
     assert response.status_code == 422  # Validation error
 
 
 # Order endpoint tests
-def test_create_order_no_discount_with_shipping(setup_test_db):
-    """Test creating an order with no discount and shipping fee applied"""
+@pytest.mark.parametrize("order_items, expected_subtotal, expected_shipping_fee, expected_discount_flags, expected_inventory", [
+    # 2 of product 1 at $10 + 3 of product 3 at $5; order is under $50 so shipping applies
+    pytest.param(
+        [{"product_id": 1, "quantity": 2}, {"product_id": 3, "quantity": 3}],
+        (2 * 10.0) + (3 * 5.0), 5.0, [False, False], {1: 18, 3: 47},
+        id="no_discount_with_shipping"
+    ),
+    # 6 of product 1 qualify for the 10% bulk discount; $74 total ships free
+    pytest.param(
+        [{"product_id": 1, "quantity": 6}, {"product_id": 2, "quantity": 1}],
+        (6 * 10.0 * 0.9) + (1 * 20.0), 0.0, [True, False], {1: 14, 2: 14},
+        id="bulk_discount_no_shipping"
+    ),
+    # A single $100 luxury item crosses the free shipping threshold on its own
+    pytest.param(
+        [{"product_id": 4, "quantity": 1}],
+        100.0, 0.0, [False], {4: 4},
+        id="expensive_item_no_shipping"
+    ),
+    # 30 bulk items at $2.50 each with 10% discount
+    pytest.param(
+        [{"product_id": 5, "quantity": 30}],
+        30 * 2.50 * 0.9, 0.0, [True], {5: 170},
+        id="bulk_item_with_discount"
+    ),
+    # Two lines for the same product draw on one inventory: 2 + 3 uses all 5 luxury items
+    pytest.param(
+        [{"product_id": 4, "quantity": 2}, {"product_id": 4, "quantity": 3}],
+        5 * 100.0, 0.0, [False, False], {4: 0},
+        id="repeated_product_lines"
+    ),
+])
+async def test_create_order_pricing(
+    client, db_session, order_items, expected_subtotal, expected_shipping_fee, expected_discount_flags, expected_inventory
+):
+    """Test order totals, bulk discounts, shipping fees and inventory updates"""
     order_data = {
         "customer_name": "John Doe",
         "customer_email": "john@example.com",
-        "items": [
-            {"product_id": 1, "quantity": 2},
-            {"product_id": 3, "quantity": 3}
-        ]
+        "items": order_items
     }
-    response = client.post("/orders/add_order", json=order_data)
-    assert response.status_code == 201
-    data = response.json()
+    response = await client.post("/orders/add_order", json=order_data)
+    data = json_of(response, 201)
     
-    # Calculate expected values
-    expected_subtotal = (2 * 10.0) + (3 * 5.0)  # 2 of product 1 at $10 + 3 of product 3 at $5
-    expected_shipping_fee = 5.0  # Order is under $50
     expected_total = expected_subtotal + expected_shipping_fee
     
-    assert data["subtotal"] == expected_subtotal
+    assert round(data["subtotal"], 2) == round(expected_subtotal, 2)
     assert data["shipping_fee"] == expected_shipping_fee
-    assert data["total_amount"] == expected_total
-    assert len(data["items"]) == 2
-    assert not any(item["discount_applied"] for item in data["items"])
+    assert round(data["total_amount"], 2) == round(expected_total, 2)
+    assert [item["discount_applied"] for item in data["items"]] == expected_discount_flags
     
     # Check inventory was updated
-    response = client.get("/products/get_product/1")
-    assert response.json()["inventory"] == 18  # 20 - 2
-    
-    response = client.get("/products/get_product/3")
-    assert response.json()["inventory"] == 47  # 50 - 3
+    for product_id, inventory in expected_inventory.items():
+        assert db_session.get(Product, product_id).inventory == inventory
 
 
-def test_create_order_with_bulk_discount_no_shipping(setup_test_db):
-    """Test creating an order with bulk discount and no shipping fee"""
+async def test_create_order_insufficient_inventory(client, db_session):
+    """Test order with insufficient inventory"""
     order_data = {
-        "customer_name": "Jane Smith",
-        "customer_email": "jane@example.com",
+        "customer_name": "Invalid Customer",
+        "customer_email": "invalid@example.com",
         "items": [
-            {"product_id": 1, "quantity": 6},  # Should qualify for bulk discount
-            {"product_id": 2, "quantity": 1}
+            {"product_id": 2, "quantity": 20}  # Product 2 only has 15 in inventory
         ]
     }
-    response = client.post("/orders/add_order", json=order_data)
-    assert response.status_code == 201
-    data = response.json()
-    
-    # Product 1: 6 items at $10 each with 10% discount = 6 * $10 * 0.9 = $54
-    # Product 2: 1 item at $20 = $20
-    # Total: $74
-    # No shipping fee as total > $50
-    expected_subtotal = (6 * 10.0 * 0.9) + (1 * 20.0)
-    expected_shipping_fee = 0.0  # Order is over $50
-    expected_total = expected_subtotal + expected_shipping_fee
+    response = await client.post("/orders/add_order", json=order_data)
+    body = json_of(response, 400)
+    assert "Not enough inventory" in body["detail"]
     
-    assert round(data["subtotal"], 2) == round(expected_subtotal, 2)
-    assert data["shipping_fee"] == expected_shipping_fee
-    assert round(data["total_amount"], 2) == round(expected_total, 2)
-    
-    # First item should have discount applied
-    assert data["items"][0]["discount_applied"]
-    assert not data["items"][1]["discount_applied"]
-    
-    # Verify inventory updates
-    response = client.get("/products/get_product/1")
-    assert response.json()["inventory"] == 14  # 20 - 6
-    
-    response = client.get("/products/get_product/2")
-    assert response.json()["inventory"] == 14  # 15 - 1
+    # Verify inventory wasn't changed
+    assert db_session.get(Product, 2).inventory == 15  # Still 15
 
 
-def test_create_order_expensive_item_no_shipping(setup_test_db):
-    """Test order with expensive item that automatically crosses free shipping threshold"""
+async def test_create_order_repeated_product_insufficient_inventory(client, db_session):
+    """Test that repeated lines for one product can't together exceed its inventory"""
     order_data = {
-        "customer_name": "Rich Customer",
-        "customer_email": "rich@example.com",
+        "customer_name": "Invalid Customer",
+        "customer_email": "invalid@example.com",
         "items": [
-            {"product_id": 4, "quantity": 1}  # Luxury item at $100
+            {"product_id": 4, "quantity": 3},
+            {"product_id": 4, "quantity": 3}  # Only 2 of the 5 luxury items are left for this line
         ]
     }
-    response = client.post("/orders/add_order", json=order_data)
-    assert response.status_code == 201
-    data = response.json()
+    response = await client.post("/orders/add_order", json=order_data)
+    body = json_of(response, 400)
+    assert "Available: 2" in body["detail"]
     
-    assert data["subtotal"] == 100.0
-    assert data["shipping_fee"] == 0.0  # No shipping fee as order > $50
-    assert data["total_amount"] == 100.0
+    # Verify inventory wasn't changed
+    assert db_session.get(Product, 4).inventory == 5
 
 
-def test_create_order_bulk_item_with_discount(setup_test_db):
-    """Test order with bulk items at discount"""
-    order_data = {
-        "customer_name": "Bulk Buyer",
-        "customer_email": "bulk@example.com",
-        "items": [
-            {"product_id": 5, "quantity": 30}  # 30 bulk items at $2.50 each
-        ]
-    }
-    response = client.post("/orders/add_order", json=order_data)
-    assert response.status_code == 201
-    data = response.json()
+async def test_create_order_locks_products_in_id_order(client, db_session):
+    """Test that order products are locked in primary key order, so concurrent orders can't deadlock"""
+    statements = []
     
-    # 30 items at $2.50 each with 10% discount
-    expected_subtotal = 30 * 2.50 * 0.9
-    assert round(data["subtotal"], 2) == round(expected_subtotal, 2)
-    assert data["shipping_fee"] == 0.0  # No shipping fee as order > $50
-    assert round(data["total_amount"], 2) == round(expected_subtotal, 2)
-    assert data["items"][0]["discount_applied"]
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    connection = db_session.connection()
+    event.listen(connection, "before_cursor_execute", record_statement)
+    try:
+        order_data = {
+            "customer_name": "Lock Customer",
+            "customer_email": "lock@example.com",
+            "items": [{"product_id": 3, "quantity": 1}, {"product_id": 1, "quantity": 1}]
+        }
+        response = await client.post("/orders/add_order", json=order_data)
+        json_of(response, 201)
+    finally:
+        event.remove(connection, "before_cursor_execute", record_statement)
+    
+    lock_queries = [statement for statement in statements if "WHERE products.id IN" in statement]
+    assert len(lock_queries) == 1
+    assert "ORDER BY products.id" in lock_queries[0]
 
 
-def test_create_order_insufficient_inventory(setup_test_db):
-    """Test order with insufficient inventory"""
+async def test_create_order_nonexistent_product(client, db_session):
+    """Test order with nonexistent product"""
     order_data = {
         "customer_name": "Invalid Customer",
         "customer_email": "invalid@example.com",
         "items": [
-            {"product_id": 2, "quantity": 20}  # Product 2 only has 15 in inventory
+            {"product_id": 999, "quantity": 1}  # Product doesn't exist
         ]
     }
-    response = client.post("/orders/add_order", json=order_data)
-    assert response.status_code == 400
-    assert "Not enough inventory" in response.json()["detail"]
-    
-    # Verify inventory wasn't changed
-    response = client.get("/products/get_product/2")
-    assert response.json()["inventory"] == 15  # Still 15
+    response = await client.post("/orders/add_order", json=order_data)
+    body = json_of(response, 404)
+    assert "not found" in body["detail"]
 
 
-def test_create_order_nonexistent_product(setup_test_db):
-    """Test order with nonexistent product"""
+async def test_create_order_without_items(client, db_session):
+    """Test that an order with no items is stored without any order item rows"""
     order_data = {
-        "customer_name": "Invalid Customer",
-        "customer_email": "invalid@example.com",
-        "items": [
-            {"product_id": 999, "quantity": 1}  # Product doesn't exist
-        ]
+        "customer_name": "Empty Customer",
+        "customer_email": "empty@example.com",
+        "items": []
     }
-    response = client.post("/orders/add_order", json=order_data)
-    assert response.status_code == 404
-    assert "not found" in response.json()["detail"]
+    response = await client.post("/orders/add_order", json=order_data)
+    data = json_of(response, 201)
+    assert data["items"] == []
+    assert data["subtotal"] == 0.0
+    assert data["shipping_fee"] == 5.0
+    
+    # Verify the order was stored and no item rows were inserted
+    assert db_session.query(Order).count() == 1
+    assert db_session.query(OrderItem).count() == 0
 
 
-def test_create_order_validation(setup_test_db):
+async def test_create_order_validation(client, seeded_db):
     """Test order input validation"""
     # Invalid email
     order_data = {
@@ -392,7 +386,7 @@ def test_create_order_validation(setup_test_db):
             {"product_id": 1, "quantity": 1}
         ]
     }
-    response = client.post("/orders/add_order", json=order_data)
+    response = await client.post("/orders/add_order", json=order_data)
     assert response.status_code == 422  # Validation error
     
     # Missing customer name
@@ -402,7 +396,7 @@ def test_create_order_validation(setup_test_db):
             {"product_id": 1, "quantity": 1}
         ]
     }
-    response = client.post("/orders/add_order", json=order_data)
+    response = await client.post("/orders/add_order", json=order_data)
     assert response.status_code == 422  # Validation error
     
     # Zero quantity
@@ -413,7 +407,7 @@ def test_create_order_validation(setup_test_db):
             {"product_id": 1, "quantity": 0}
         ]
     }
-    response = client.post("/orders/add_order", json=order_data)
+    response = await client.post("/orders/add_order", json=order_data)
     assert response.status_code == 422  # Validation error
     
     # Negative quantity
@@ -424,11 +418,11 @@ def test_create_order_validation(setup_test_db):
             {"product_id": 1, "quantity": -1}
         ]
     }
-    response = client.post("/orders/add_order", json=order_data)
+    response = await client.post("/orders/add_order", json=order_data)
     assert response.status_code == 422  # Validation error
 
 
-def test_get_orders(setup_test_db):
+async def test_get_orders(client, db_session):
     """Test getting all orders"""
     # First, create some orders
     order_data_1 = {
@@ -442,32 +436,54 @@ def test_get_orders(setup_test_db):
         "items": [{"product_id": 2, "quantity": 2}]
     }
     
-    client.post("/orders/add_order", json=order_data_1)
-    client.post("/orders/add_order", json=order_data_2)
+    await client.post("/orders/add_order", json=order_data_1)
+    await client.post("/orders/add_order", json=order_data_2)
     
     # Now get all orders
-    response = client.get("/orders/get_all_orders")
-    assert response.status_code == 200
-    orders = response.json()
+    response = await client.get("/orders/get_all_orders")
+    orders = json_of(response, 200)
     assert len(orders) == 2
     assert orders[0]["customer_name"] == "Customer One"
     assert orders[1]["customer_name"] == "Customer Two"
     
     # Test pagination
-    response = client.get("/orders/get_all_orders?skip=1")
-    assert response.status_code == 200
-    orders = response.json()
+    response = await client.get("/orders/get_all_orders?skip=1")
+    orders = json_of(response, 200)
     assert len(orders) == 1
     assert orders[0]["customer_name"] == "Customer Two"
     
-    response = client.get("/orders/get_all_orders?limit=1")
-    assert response.status_code == 200
-    orders = response.json()
+    response = await client.get("/orders/get_all_orders?limit=1")
+    orders = json_of(response, 200)
     assert len(orders) == 1
     assert orders[0]["customer_name"] == "Customer One"
 
 
-def test_get_order(setup_test_db):
+async def test_get_orders_etag(client, db_session):
+    order_data = {
+        "customer_name": "Customer One",
+        "customer_email": "one@example.com",
+        "items": [{"product_id": 1, "quantity": 1}]
+    }
+    json_of(await client.post("/orders/add_order", json=order_data), 201)
+    
+    response = await client.get("/orders/get_all_orders")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, max-age=5"
+    
+    # Unchanged orders revalidate without a body
+    response = await client.get("/orders/get_all_orders", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    
+    # A new order produces a new ETag
+    json_of(await client.post("/orders/add_order", json=order_data), 201)
+    response = await client.get("/orders/get_all_orders", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+async def test_get_order(client, db_session):
     """Test getting a specific order"""
     # First, create an order
     order_data = {
@@ -478,19 +494,17 @@ def test_get_order(setup_test_db):
             {"product_id": 2, "quantity": 2}
         ]
     }
-    response = client.post("/orders/add_order", json=order_data)
-    assert response.status_code == 201
-    order_id = response.json()["id"]
+    response = await client.post("/orders/add_order", json=order_data)
+    order_id = json_of(response, 201)["id"]
     
     # Now get the order
-    response = client.get(f"/orders/get_order/{order_id}")
-    assert response.status_code == 200
-    order = response.json()
+    response = await client.get(f"/orders/get_order/{order_id}")
+    order = json_of(response, 200)
     assert order["customer_name"] == "Test Customer"
     assert order["customer_email"] == "test@example.com"
     assert len(order["items"]) == 2
     
     # Try to get non-existent order
-    response = client.get("/orders/get_order/999")
-    assert response.status_code == 404
-    assert response.json()["detail"] == "Order not found"
+    response = await client.get("/orders/get_order/999")
+    body = json_of(response, 404)
+    assert body["detail"] == "Order not found"